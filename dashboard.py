@@ -1,8 +1,42 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import psycopg2
-import plotly.express as px
-from datetime import datetime
+import numpy as np
+from psycopg2.pool import ThreadedConnectionPool
+import connectorx as cx
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import quote
+
+# Weekday labels indexed by pandas' dayofweek (0 = Monday .. 6 = Sunday)
+_WEEKDAY_PT = np.array(['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo'])
+
+# Column dtypes applied to the task frame at load time: low-cardinality strings as
+# categoricals so groupby/value_counts run on integer codes, flags as 1-byte bools
+_TASK_DTYPES = {
+    'status': 'category',
+    'assignee_name': 'category',
+    'done': 'bool'
+}
+
+# Cached data refreshes in fixed 5-minute windows
+_REFRESH_SECONDS = 300
+
+# On-disk copy of query results, private to this user
+_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "eali"
+
+# Connection pool bounds
+_POOL_MAX_CONN = 8
+_WARMUP_WORKERS = 4
 
 # Page configuration
 st.set_page_config(
@@ -11,12 +45,14 @@ st.set_page_config(
     layout="wide"
 )
 
-# Database connection
+# Database connection pool, shared by all sessions (a bare connection is not safe across threads)
 @st.cache_resource
-def get_connection():
+def get_pool():
     try:
         # Try to get credentials from Streamlit secrets
-        return psycopg2.connect(
+        return ThreadedConnectionPool(
+            minconn=_WARMUP_WORKERS,
+            maxconn=_POOL_MAX_CONN,
             host=st.secrets["connections"]["postgresql"]["host"],
             database=st.secrets["connections"]["postgresql"]["database"],
             user=st.secrets["connections"]["postgresql"]["user"],
@@ -29,301 +65,611 @@ def get_connection():
         st.info("Configure os secrets no Streamlit Cloud: Settings → Secrets")
         raise
 
-@st.cache_data(ttl=300)
-def load_tasks():
-    conn = get_connection()
-    query = """
-        SELECT
-            task_id, title, assignee_name, project_name, status, done,
-            archived, started_at, due_at, completed_at, created_at,
-            updated_at, comment_count
-        FROM blue_tasks
-    """
-    return pd.read_sql(query, conn)
-
-# Title
-st.title("📊 EALI - Dashboard de Produtividade")
-st.markdown("---")
-
-# Load data
-try:
-    df_tasks = load_tasks()
-
-    # DEBUG: Mostrar estatísticas dos dados
-    st.sidebar.markdown("---")
-    st.sidebar.subheader("Debug Info")
-    st.sidebar.write(f"Total de tarefas: {len(df_tasks)}")
-    st.sidebar.write(f"Tarefas com assignee: {df_tasks['assignee_name'].notna().sum()}")
-    st.sidebar.write(f"Assignees únicos: {df_tasks['assignee_name'].nunique()}")
-
-    # Mostrar alguns assignee_names
-    if df_tasks['assignee_name'].notna().any():
-        st.sidebar.write("Funcionários encontrados:")
-        st.sidebar.write(df_tasks['assignee_name'].value_counts().head(5))
-
-except Exception as e:
-    st.error(f"Erro ao conectar ao banco de dados: {e}")
-    st.stop()
-
-# Convert dates
-df_tasks['created_at'] = pd.to_datetime(df_tasks['created_at'])
-df_tasks['completed_at'] = pd.to_datetime(df_tasks['completed_at'])
-
-# Sidebar filters
-st.sidebar.header("Filtros")
-
-# Status filter
-all_statuses = df_tasks['status'].dropna().unique().tolist()
-selected_statuses = st.sidebar.multiselect(
-    "Status",
-    options=all_statuses,
-    default=all_statuses
-)
-
-# Date filter
-min_date = df_tasks['created_at'].min().date()
-max_date = df_tasks['created_at'].max().date()
-date_range = st.sidebar.date_input(
-    "Período",
-    value=(min_date, max_date),
-    min_value=min_date,
-    max_value=max_date
-)
+# Checkouts wait for a free slot instead of raising PoolError
+@st.cache_resource
+def get_pool_slots():
+    return threading.BoundedSemaphore(_POOL_MAX_CONN)
+
+@contextmanager
+def get_conn():
+    pool = get_pool()
+    with get_pool_slots():
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            pool.putconn(conn)
+
+def get_database_url():
+    pg = st.secrets["connections"]["postgresql"]
+    return (
+        f"postgresql://{quote(pg['user'], safe='')}:{quote(pg['password'], safe='')}"
+        f"@{pg['host']}:{pg.get('port', 5432)}/{pg['database']}"
+    )
 
-# Apply filters
-df_filtered = df_tasks.copy()
-if selected_statuses:
-    df_filtered = df_filtered[df_filtered['status'].isin(selected_statuses)]
-if len(date_range) == 2:
-    df_filtered = df_filtered[
-        (df_filtered['created_at'].dt.date >= date_range[0]) &
-        (df_filtered['created_at'].dt.date <= date_range[1])
-    ]
+def refresh_window():
+    return int(time.time() // _REFRESH_SECONDS)
 
-# KPIs
-st.header("Visão Geral")
-col1, col2, col3, col4 = st.columns(4)
+@st.cache_resource
+def get_cache_dir():
+    try:
+        _CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        info = _CACHE_DIR.stat()
+        # Only use a directory this user owns
+        if info.st_uid != os.getuid():
+            return None
+        if info.st_mode & 0o077:
+            _CACHE_DIR.chmod(0o700)
+        return _CACHE_DIR
+    except OSError:
+        # No disk cache; queries go straight to the database
+        return None
+
+def read_sql(query, window, params=None, columnar=False):
+    # Keyed by the target database, the query template and its parameters
+    cache_dir = get_cache_dir()
+    path = None
+    if cache_dir is not None:
+        pg = st.secrets["connections"]["postgresql"]
+        target = (pg['host'], pg.get('port', 5432), pg['database'], pg['user'])
+        key = hashlib.blake2b(repr((target, query, params)).encode(), digest_size=16).hexdigest()
+        path = cache_dir / f"{key}.parquet"
+        try:
+            # Only serve files from the current window
+            if path.stat().st_mtime >= window * _REFRESH_SECONDS:
+                return pd.read_parquet(path)
+        except OSError:
+            pass
+
+    df = fetch_columnar(query, params) if columnar else fetch_rows(query, params)
+    if path is not None:
+        store_cached_result(path, df, window)
+    return df
+
+def fetch_rows(query, params):
+    # Small result sets run on a pooled connection
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+        columns = [column[0] for column in cur.description]
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+def fetch_columnar(query, params):
+    # connectorx has no parameter binding, so let psycopg2 quote the values
+    if params:
+        with get_conn() as conn, conn.cursor() as cur:
+            query = cur.mogrify(query, params).decode()
+
+    # Columnar fetch straight into Arrow buffers, skipping DB-API row tuples
+    return cx.read_sql(get_database_url(), query, return_type="arrow").to_pandas()
+
+def store_cached_result(path, df, window):
+    try:
+        # Write under a unique name and rename, so readers never see a partial file
+        tmp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp")
+        df.to_parquet(tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+        # Drop files from earlier windows
+        for old_path in path.parent.iterdir():
+            if old_path.stat().st_mtime < window * _REFRESH_SECONDS:
+                old_path.unlink(missing_ok=True)
+    except OSError:
+        # Best effort: the result is returned either way
+        pass
+
+def build_task_filters(statuses, date_from, date_to):
+    # Half-open range so tasks created during the last selected day are kept
+    conditions = ["created_at >= %s", "created_at < %s"]
+    params = [date_from, date_to + timedelta(days=1)]
+    if statuses:
+        conditions.append("status = ANY(%s)")
+        params.append(list(statuses))
+    return " AND ".join(conditions), params
 
-total_tasks = len(df_filtered)
-completed_tasks = df_filtered['done'].sum()
-pending_tasks = len(df_filtered[df_filtered['done'] == False])
-archived_tasks = df_filtered['archived'].sum()
+@st.cache_data(ttl=300)
+def load_filter_options(window):
+    statuses = read_sql(
+        "SELECT DISTINCT status FROM blue_tasks WHERE status IS NOT NULL ORDER BY status",
+        window
+    )
+    bounds = read_sql(
+        "SELECT MIN(created_at)::date AS min_date, MAX(created_at)::date AS max_date FROM blue_tasks",
+        window
+    )
+    return statuses['status'].tolist(), bounds['min_date'].iloc[0], bounds['max_date'].iloc[0]
 
-with col1:
-    st.metric("Total de Tarefas", total_tasks)
-with col2:
-    st.metric("Concluídas", int(completed_tasks))
-with col3:
-    st.metric("Pendentes", pending_tasks)
-with col4:
-    st.metric("Arquivadas", int(archived_tasks))
+# Whole-table figures for the debug panel: they ignore the sidebar filters on purpose,
+# so they show what is actually in blue_tasks when the dashboard looks wrong
+@st.cache_data(ttl=300)
+def load_debug_stats(window):
+    counts = read_sql("""
+        SELECT
+            COUNT(*) AS total,
+            COUNT(assignee_name) AS with_assignee,
+            COUNT(DISTINCT assignee_name) AS unique_assignees
+        FROM blue_tasks
+    """, window).iloc[0]
+    top_assignees = read_sql("""
+        SELECT assignee_name, COUNT(*) AS count
+        FROM blue_tasks
+        WHERE assignee_name IS NOT NULL
+        GROUP BY assignee_name
+        ORDER BY 2 DESC
+        LIMIT 5
+    """, window)
+    return {
+        'total': int(counts['total']),
+        'with_assignee': int(counts['with_assignee']),
+        'unique_assignees': int(counts['unique_assignees']),
+        'top_assignees': top_assignees.set_index('assignee_name')['count']
+    }
 
-st.markdown("---")
+@st.cache_data(ttl=300, max_entries=32)
+def load_tasks(statuses, date_from, date_to, window):
+    where, params = build_task_filters(statuses, date_from, date_to)
+    # Only the columns the pandas-side sections read; KPIs and monthly series are aggregated in SQL
+    query = f"""
+        SELECT assignee_name, status, done, created_at
+        FROM blue_tasks
+        WHERE {where}
+    """
+    df = read_sql(query, window, params, columnar=True).astype(_TASK_DTYPES)
+    # Normalise timestamps once per TTL here, never at render time
+    df['created_at'] = pd.to_datetime(df['created_at'], utc=True)
+    return df
+
+# Pre-aggregated queries: only a handful of rows cross the wire for these sections
+@st.cache_data(ttl=300, max_entries=32)
+def load_task_kpis(statuses, date_from, date_to, window):
+    where, params = build_task_filters(statuses, date_from, date_to)
+    query = f"""
+        SELECT
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE done) AS done,
+            COUNT(*) FILTER (WHERE archived) AS archived
+        FROM blue_tasks
+        WHERE {where}
+    """
+    row = read_sql(query, window, params).iloc[0]
+    total, done = int(row['total']), int(row['done'])
+    return {'total': total, 'done': done, 'pending': total - done, 'archived': int(row['archived'])}
+
+@st.cache_data(ttl=300, max_entries=32)
+def load_task_status(statuses, date_from, date_to, window):
+    where, params = build_task_filters(statuses, date_from, date_to)
+    query = f"""
+        SELECT status AS "Status", COUNT(*) AS "Quantidade"
+        FROM blue_tasks
+        WHERE {where} AND status IS NOT NULL
+        GROUP BY status
+        ORDER BY 2 DESC
+    """
+    return read_sql(query, window, params)
+
+@st.cache_data(ttl=300, max_entries=32)
+def load_tasks_monthly(statuses, date_from, date_to, window):
+    where, params = build_task_filters(statuses, date_from, date_to)
+    # Group on the truncated timestamp (an integer key) and only format the distinct months
+    query = f"""
+        SELECT to_char(date_trunc('month', created_at), 'YYYY-MM') AS month, COUNT(*) AS "Quantidade"
+        FROM blue_tasks
+        WHERE {where}
+        GROUP BY date_trunc('month', created_at)
+        ORDER BY date_trunc('month', created_at)
+    """
+    return read_sql(query, window, params)
+
+@st.cache_data(ttl=300, max_entries=32)
+def load_tasks_completed_monthly(statuses, date_from, date_to, window):
+    where, params = build_task_filters(statuses, date_from, date_to)
+    # Tasks marked done without a completion date are left out
+    query = f"""
+        SELECT to_char(date_trunc('month', completed_at), 'YYYY-MM') AS completed_month, COUNT(*) AS "Quantidade"
+        FROM blue_tasks
+        WHERE {where} AND done AND completed_at IS NOT NULL
+        GROUP BY date_trunc('month', completed_at)
+        ORDER BY date_trunc('month', completed_at)
+    """
+    return read_sql(query, window, params)
 
-# Charts row 1
-col1, col2 = st.columns(2)
+@st.cache_data(ttl=300, max_entries=32)
+def load_recent_tasks(statuses, date_from, date_to, window, limit=15):
+    where, params = build_task_filters(statuses, date_from, date_to)
+    # Top-k in the database (created_at index scanned backwards) instead of sorting every row
+    query = f"""
+        SELECT
+            title AS "Título",
+            status AS "Status",
+            CASE WHEN done THEN 'Sim' ELSE 'Não' END AS "Concluída",
+            created_at AS "Criada em"
+        FROM blue_tasks
+        WHERE {where}
+        ORDER BY created_at DESC
+        LIMIT %s
+    """
+    return read_sql(query, window, params + [limit])
+
+# Aggregations, cached per filter combination (each chart only receives the small frame it plots)
+@st.cache_data(ttl=300, max_entries=64)
+def compute_weekday_counts(statuses, date_from, date_to, window):
+    df = load_tasks(statuses, date_from, date_to, window)
+    dow = df['created_at'].dt.dayofweek.to_numpy()
+    counts = np.bincount(dow, minlength=7)
+    return pd.DataFrame({'Dia': _WEEKDAY_PT, 'Quantidade': counts})
+
+@st.cache_data(ttl=300, max_entries=64)
+def compute_employee_summary(statuses, date_from, date_to, window):
+    df = load_tasks(statuses, date_from, date_to, window)
+    # A single groupby feeds the counts chart, the completion chart and the ranking;
+    # unassigned rows drop out as NaN keys, so the frame is never sliced/copied
+    emp = df.groupby('assignee_name', observed=True, sort=False).agg(
+        total=('done', 'size'),
+        done=('done', 'sum')
+    ).reset_index()
+    emp['pending'] = emp['total'] - emp['done']
+    emp['rate'] = (emp['done'] / emp['total'] * 100).round(1)
+
+    employee_counts = emp.nlargest(10, 'total')[['assignee_name', 'total']]
+    employee_counts.columns = ['Funcionário', 'Total de Tarefas']
+
+    employee_completion = emp.nsmallest(10, 'rate')[['assignee_name', 'done', 'total', 'rate']]
+    employee_completion.columns = ['Funcionário', 'Concluídas', 'Total', 'Taxa (%)']
+
+    ranking = emp.sort_values('done', ascending=False)[['assignee_name', 'total', 'done', 'pending', 'rate']]
+    ranking.columns = ['Funcionário', 'Total de Tarefas', 'Tarefas Concluídas', 'Pendentes', 'Taxa de Conclusão (%)']
 
-with col1:
+    # Add ranking position
+    ranking.insert(0, 'Posição', range(1, len(ranking) + 1))
+    return employee_counts, employee_completion, ranking
+
+@st.cache_data(ttl=300, max_entries=64)
+def compute_employee_status(statuses, date_from, date_to, window):
+    df = load_tasks(statuses, date_from, date_to, window)
+    # Reuse the top 10 employees by total tasks from the shared employee summary
+    employee_counts, _, _ = compute_employee_summary(statuses, date_from, date_to, window)
+
+    # Cross-tabulate only their rows, so the table is at most 10 x |status|
+    top_tasks = df[df['assignee_name'].isin(employee_counts['Funcionário'])]
+    employee_status = pd.crosstab(top_tasks['assignee_name'], top_tasks['status']).stack().reset_index(name='Quantidade')
+    return employee_status[employee_status['Quantidade'] > 0]
+
+# Figures, cached on the values they plot
+@st.cache_resource(ttl=300, max_entries=64)
+def status_pie_figure(statuses, counts):
+    fig = go.Figure(go.Pie(labels=statuses, values=counts))
+    fig.update_layout(height=350, piecolorway=qualitative.Set2)
+    return fig
+
+@st.cache_resource(ttl=300, max_entries=64)
+def bar_chart_figure(x, y, color, xlabel, ylabel):
+    fig = go.Figure(go.Bar(x=x, y=y, marker_color=color))
+    fig.update_layout(height=350, xaxis_title=xlabel, yaxis_title=ylabel)
+    return fig
+
+@st.cache_resource(ttl=300, max_entries=64)
+def employee_counts_figure(employees, totals):
+    totals = np.asarray(totals)
+    fig = go.Figure(go.Bar(
+        x=employees,
+        y=totals,
+        text=totals,
+        textposition='outside',
+        marker=dict(color=totals, colorscale='Blues', showscale=True,
+                    colorbar=dict(title='Total de Tarefas'))
+    ))
+    fig.update_layout(height=400, showlegend=False,
+                      xaxis_title='Funcionário', yaxis_title='Total de Tarefas')
+    return fig
+
+@st.cache_resource(ttl=300, max_entries=64)
+def employee_completion_figure(employees, rates):
+    rates = np.asarray(rates)
+    fig = go.Figure(go.Bar(
+        x=rates,
+        y=employees,
+        orientation='h',
+        text=rates,
+        texttemplate='%{text:.1f}%',
+        textposition='outside',
+        marker=dict(color=rates, colorscale='Greens', showscale=True,
+                    colorbar=dict(title='Taxa (%)'))
+    ))
+    fig.update_layout(height=400, showlegend=False,
+                      xaxis_title='Taxa (%)', yaxis_title='Funcionário')
+    return fig
+
+@st.cache_resource(ttl=300, max_entries=64)
+def employee_status_figure(employees, statuses, counts):
+    employees = np.asarray(employees)
+    statuses = np.asarray(statuses)
+    counts = np.asarray(counts)
+    # One stacked trace per status, in order of first appearance
+    fig = go.Figure([
+        go.Bar(x=employees[statuses == status], y=counts[statuses == status], name=status)
+        for status in pd.unique(statuses)
+    ])
+    fig.update_layout(
+        height=400,
+        barmode='relative',
+        colorway=qualitative.Set2,
+        title='Distribuição de Status (Top 10 Funcionários)',
+        xaxis_title='Funcionário',
+        yaxis_title='Número de Tarefas',
+        legend_title_text='status'
+    )
+    return fig
+
+# Rendering (one function per section, reading the aggregates cached for the current filters)
+def render_kpis(filters):
+    col1, col2, col3, col4 = st.columns(4)
+    kpis = load_task_kpis(*filters)
+
+    with col1:
+        st.metric("Total de Tarefas", kpis['total'])
+    with col2:
+        st.metric("Concluídas", kpis['done'])
+    with col3:
+        st.metric("Pendentes", kpis['pending'])
+    with col4:
+        st.metric("Arquivadas", kpis['archived'])
+
+def render_completion_rate(filters):
+    kpis = load_task_kpis(*filters)
+    if kpis['total'] > 0:
+        completion_rate = (kpis['done'] / kpis['total']) * 100
+        st.subheader("Taxa de Conclusão")
+        st.progress(completion_rate / 100)
+        st.write(f"**{completion_rate:.1f}%** das tarefas foram concluídas")
+
+def render_status_chart(filters):
     st.subheader("Distribuição por Status")
-    status_counts = df_filtered['status'].value_counts().reset_index()
-    status_counts.columns = ['Status', 'Quantidade']
+    status_counts = load_task_status(*filters)
     if not status_counts.empty:
-        fig_status = px.pie(
-            status_counts,
-            values='Quantidade',
-            names='Status',
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
-        fig_status.update_layout(height=350)
+        fig_status = status_pie_figure(tuple(status_counts['Status']), tuple(status_counts['Quantidade']))
         st.plotly_chart(fig_status, use_container_width=True)
     else:
         st.info("Sem dados de status disponíveis")
 
-with col2:
+def render_monthly_chart(filters):
     st.subheader("Tarefas Criadas por Mês")
-    df_filtered['month'] = df_filtered['created_at'].dt.to_period('M').astype(str)
-    monthly_tasks = df_filtered.groupby('month').size().reset_index(name='Quantidade')
+    monthly_tasks = load_tasks_monthly(*filters)
     if not monthly_tasks.empty:
-        fig_monthly = px.bar(
-            monthly_tasks,
-            x='month',
-            y='Quantidade',
-            labels={'month': 'Mês', 'Quantidade': 'Tarefas'},
-            color_discrete_sequence=['#3498db']
+        fig_monthly = bar_chart_figure(
+            tuple(monthly_tasks['month']),
+            tuple(monthly_tasks['Quantidade']),
+            '#3498db', 'Mês', 'Tarefas'
         )
-        fig_monthly.update_layout(height=350)
         st.plotly_chart(fig_monthly, use_container_width=True)
     else:
         st.info("Sem dados mensais disponíveis")
 
-# Completion rate
-if total_tasks > 0:
-    completion_rate = (completed_tasks / total_tasks) * 100
-    st.subheader("Taxa de Conclusão")
-    st.progress(completion_rate / 100)
-    st.write(f"**{completion_rate:.1f}%** das tarefas foram concluídas")
-
-st.markdown("---")
-
-# Charts row 2
-col1, col2 = st.columns(2)
-
-with col1:
+def render_completed_chart(filters):
     st.subheader("Tarefas Concluídas por Mês")
-    df_completed = df_filtered[df_filtered['done'] == True].copy()
-    if not df_completed.empty and df_completed['completed_at'].notna().any():
-        df_completed['completed_month'] = df_completed['completed_at'].dt.to_period('M').astype(str)
-        completed_monthly = df_completed.groupby('completed_month').size().reset_index(name='Quantidade')
-        fig_completed = px.bar(
-            completed_monthly,
-            x='completed_month',
-            y='Quantidade',
-            labels={'completed_month': 'Mês', 'Quantidade': 'Concluídas'},
-            color_discrete_sequence=['#2ecc71']
+    completed_monthly = load_tasks_completed_monthly(*filters)
+    if not completed_monthly.empty:
+        fig_completed = bar_chart_figure(
+            tuple(completed_monthly['completed_month']),
+            tuple(completed_monthly['Quantidade']),
+            '#2ecc71', 'Mês', 'Concluídas'
         )
-        fig_completed.update_layout(height=350)
         st.plotly_chart(fig_completed, use_container_width=True)
     else:
         st.info("Sem dados de conclusão disponíveis")
 
-with col2:
+def render_weekday_chart(filters):
     st.subheader("Tarefas por Dia da Semana")
-    df_filtered['weekday'] = df_filtered['created_at'].dt.day_name()
-    weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    weekday_pt = {
-        'Monday': 'Segunda', 'Tuesday': 'Terça', 'Wednesday': 'Quarta',
-        'Thursday': 'Quinta', 'Friday': 'Sexta', 'Saturday': 'Sábado', 'Sunday': 'Domingo'
-    }
-    df_filtered['weekday_pt'] = df_filtered['weekday'].map(weekday_pt)
-    weekday_counts = df_filtered['weekday'].value_counts().reindex(weekday_order).reset_index()
-    weekday_counts.columns = ['Dia', 'Quantidade']
-    weekday_counts['Dia'] = weekday_counts['Dia'].map(weekday_pt)
+    weekday_counts = compute_weekday_counts(*filters)
     if not weekday_counts.empty:
-        fig_weekday = px.bar(
-            weekday_counts,
-            x='Dia',
-            y='Quantidade',
-            color_discrete_sequence=['#9b59b6']
+        fig_weekday = bar_chart_figure(
+            tuple(weekday_counts['Dia']),
+            tuple(weekday_counts['Quantidade']),
+            '#9b59b6', 'Dia', 'Quantidade'
         )
-        fig_weekday.update_layout(height=350)
         st.plotly_chart(fig_weekday, use_container_width=True)
     else:
         st.info("Sem dados disponíveis")
 
-st.markdown("---")
-
-# Employee analytics section
-st.header("📈 Análise por Funcionário")
-
-col1, col2 = st.columns(2)
-
-with col1:
+def render_employee_counts_chart(filters):
     st.subheader("Tarefas por Funcionário")
-    # Filter out null assignees
-    df_with_assignee = df_filtered[df_filtered['assignee_name'].notna()]
-    if not df_with_assignee.empty:
-        employee_counts = df_with_assignee['assignee_name'].value_counts().reset_index()
-        employee_counts.columns = ['Funcionário', 'Total de Tarefas']
-        fig_employee = px.bar(
-            employee_counts.head(10),
-            x='Funcionário',
-            y='Total de Tarefas',
-            color='Total de Tarefas',
-            color_continuous_scale='Blues',
-            text='Total de Tarefas'
+    employee_counts, _, _ = compute_employee_summary(*filters)
+    if not employee_counts.empty:
+        fig_employee = employee_counts_figure(
+            tuple(employee_counts['Funcionário']),
+            tuple(employee_counts['Total de Tarefas'])
         )
-        fig_employee.update_traces(textposition='outside')
-        fig_employee.update_layout(height=400, showlegend=False)
         st.plotly_chart(fig_employee, use_container_width=True)
     else:
         st.info("Sem dados de funcionários disponíveis")
 
-with col2:
+def render_employee_completion_chart(filters):
     st.subheader("Taxa de Conclusão por Funcionário")
-    if not df_with_assignee.empty:
-        employee_completion = df_with_assignee.groupby('assignee_name').agg({
-            'done': ['sum', 'count']
-        }).reset_index()
-        employee_completion.columns = ['Funcionário', 'Concluídas', 'Total']
-        employee_completion['Taxa (%)'] = (employee_completion['Concluídas'] / employee_completion['Total'] * 100).round(1)
-        employee_completion = employee_completion.sort_values('Taxa (%)', ascending=True).head(10)
-
-        fig_completion = px.bar(
-            employee_completion,
-            y='Funcionário',
-            x='Taxa (%)',
-            orientation='h',
-            color='Taxa (%)',
-            color_continuous_scale='Greens',
-            text='Taxa (%)'
+    _, employee_completion, _ = compute_employee_summary(*filters)
+    if not employee_completion.empty:
+        fig_completion = employee_completion_figure(
+            tuple(employee_completion['Funcionário']),
+            tuple(employee_completion['Taxa (%)'])
         )
-        fig_completion.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        fig_completion.update_layout(height=400, showlegend=False)
         st.plotly_chart(fig_completion, use_container_width=True)
     else:
         st.info("Sem dados de conclusão disponíveis")
 
-st.markdown("---")
+def render_employee_status_chart(filters):
+    st.subheader("Status das Tarefas por Funcionário")
+    employee_counts, _, _ = compute_employee_summary(*filters)
+    if not employee_counts.empty:
+        employee_status_filtered = compute_employee_status(*filters)
+        if not employee_status_filtered.empty:
+            fig_status_employee = employee_status_figure(
+                tuple(employee_status_filtered['assignee_name']),
+                tuple(employee_status_filtered['status']),
+                tuple(employee_status_filtered['Quantidade'])
+            )
+            st.plotly_chart(fig_status_employee, use_container_width=True)
+        else:
+            st.info("Sem dados de status por funcionário disponíveis")
+    else:
+        st.info("Sem dados de funcionários disponíveis")
 
-# Employee status breakdown
-st.subheader("Status das Tarefas por Funcionário")
-if not df_with_assignee.empty:
-    employee_status = df_with_assignee.groupby(['assignee_name', 'status']).size().reset_index(name='Quantidade')
-
-    # Get top 10 employees by total tasks
-    top_employees = df_with_assignee['assignee_name'].value_counts().head(10).index.tolist()
-    employee_status_filtered = employee_status[employee_status['assignee_name'].isin(top_employees)]
-
-    if not employee_status_filtered.empty:
-        fig_status_employee = px.bar(
-            employee_status_filtered,
-            x='assignee_name',
-            y='Quantidade',
-            color='status',
-            title='Distribuição de Status (Top 10 Funcionários)',
-            labels={'assignee_name': 'Funcionário', 'Quantidade': 'Número de Tarefas'},
-            color_discrete_sequence=px.colors.qualitative.Set2
+def render_ranking(filters):
+    st.subheader("🏆 Ranking de Produtividade")
+    _, _, ranking = compute_employee_summary(*filters)
+    if not ranking.empty:
+        st.dataframe(
+            ranking,
+            use_container_width=True,
+            hide_index=True
         )
-        fig_status_employee.update_layout(height=400)
-        st.plotly_chart(fig_status_employee, use_container_width=True)
     else:
-        st.info("Sem dados de status por funcionário disponíveis")
-else:
-    st.info("Sem dados de funcionários disponíveis")
+        st.info("Sem dados de funcionários disponíveis")
 
-st.markdown("---")
+def render_recent_tasks(filters):
+    st.subheader("Tarefas Recentes")
+    recent_tasks = load_recent_tasks(*filters)
+    st.dataframe(recent_tasks, use_container_width=True)
 
-# Ranking table
-st.subheader("🏆 Ranking de Produtividade")
-if not df_with_assignee.empty:
-    ranking = df_with_assignee.groupby('assignee_name').agg({
-        'task_id': 'count',
-        'done': 'sum'
-    }).reset_index()
-    ranking.columns = ['Funcionário', 'Total de Tarefas', 'Tarefas Concluídas']
-    ranking['Pendentes'] = ranking['Total de Tarefas'] - ranking['Tarefas Concluídas']
-    ranking['Taxa de Conclusão (%)'] = (ranking['Tarefas Concluídas'] / ranking['Total de Tarefas'] * 100).round(1)
-    ranking = ranking.sort_values('Tarefas Concluídas', ascending=False)
+# The toggle lives inside the fragment, so flipping it reruns only this block, not the page
+@st.fragment
+def render_debug_info():
+    if not st.toggle("Debug Info", key="debug"):
+        return
+    try:
+        debug_stats = load_debug_stats(refresh_window())
+    except Exception as e:
+        st.error(f"Erro ao conectar ao banco de dados: {e}")
+        return
+
+    # The counts go out as one markdown block instead of one element per line
+    lines = [
+        "### Debug Info",
+        f"Total de tarefas: {debug_stats['total']}  ",
+        f"Tarefas com assignee: {debug_stats['with_assignee']}  ",
+        f"Assignees únicos: {debug_stats['unique_assignees']}"
+    ]
 
-    # Add ranking position
-    ranking.insert(0, 'Posição', range(1, len(ranking) + 1))
+    # Mostrar alguns assignee_names (as a table: names are data, never parsed as markdown)
+    if debug_stats['with_assignee'] > 0:
+        lines.append("\nFuncionários encontrados:")
+        st.markdown("\n".join(lines))
+        st.dataframe(debug_stats['top_assignees'])
+    else:
+        st.markdown("\n".join(lines))
 
-    st.dataframe(
-        ranking,
-        use_container_width=True,
-        hide_index=True
-    )
-else:
-    st.info("Sem dados de funcionários disponíveis")
+def render_dashboard(filters):
+    # KPIs
+    st.header("Visão Geral")
+    render_kpis(filters)
+
+    st.markdown("---")
+
+    # Charts row 1
+    col1, col2 = st.columns(2)
+
+    with col1:
+        render_status_chart(filters)
+
+    with col2:
+        render_monthly_chart(filters)
+
+    # Completion rate
+    render_completion_rate(filters)
+
+    st.markdown("---")
+
+    # Charts row 2
+    col1, col2 = st.columns(2)
+
+    with col1:
+        render_completed_chart(filters)
+
+    with col2:
+        render_weekday_chart(filters)
+
+    st.markdown("---")
+
+    # Employee analytics section
+    st.header("📈 Análise por Funcionário")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        render_employee_counts_chart(filters)
+
+    with col2:
+        render_employee_completion_chart(filters)
+
+    st.markdown("---")
+
+    # Employee status breakdown
+    render_employee_status_chart(filters)
 
+    st.markdown("---")
+
+    # Ranking table
+    render_ranking(filters)
+
+    st.markdown("---")
+
+    # Recent tasks table
+    render_recent_tasks(filters)
+
+# Title
+st.title("📊 EALI - Dashboard de Produtividade")
 st.markdown("---")
 
-# Recent tasks table
-st.subheader("Tarefas Recentes")
-recent_tasks = df_filtered[['title', 'status', 'done', 'created_at']].sort_values('created_at', ascending=False).head(15)
-recent_tasks.columns = ['Título', 'Status', 'Concluída', 'Criada em']
-recent_tasks['Concluída'] = recent_tasks['Concluída'].map({True: 'Sim', False: 'Não'})
-st.dataframe(recent_tasks, use_container_width=True)
+# Load filter options
+try:
+    all_statuses, min_date, max_date = load_filter_options(refresh_window())
+except Exception as e:
+    st.error(f"Erro ao conectar ao banco de dados: {e}")
+    st.stop()
+
+# Sidebar filters
+st.sidebar.header("Filtros")
+
+# Status filter
+selected_statuses = st.sidebar.multiselect(
+    "Status",
+    options=all_statuses,
+    default=all_statuses
+)
+
+# Date filter
+date_range = st.sidebar.date_input(
+    "Período",
+    value=(min_date, max_date),
+    min_value=min_date,
+    max_value=max_date
+)
+# Ignore the date filter while only the start of the range has been picked
+date_from, date_to = date_range if len(date_range) == 2 else (min_date, max_date)
+
+filters = (tuple(selected_statuses), date_from, date_to, refresh_window())
+
+# DEBUG: Mostrar estatísticas da tabela inteira, sem filtros (só quando ativado)
+st.sidebar.markdown("---")
+with st.sidebar:
+    render_debug_info()
+
+# Load data (filters are applied in the database) and render the page
+try:
+    # Warm the section caches concurrently, once per session and filter set
+    if st.session_state.get("warmed_filters") != filters:
+        loaders = (load_task_kpis, load_task_status, load_tasks_monthly,
+                   load_tasks_completed_monthly, load_recent_tasks,
+                   compute_weekday_counts, compute_employee_summary, compute_employee_status)
+        with ThreadPoolExecutor(max_workers=_WARMUP_WORKERS, initializer=add_script_run_ctx,
+                                initargs=(None, get_script_run_ctx())) as executor:
+            futures = [executor.submit(loader, *filters) for loader in loaders]
+        for future in futures:
+            future.result()
+        st.session_state["warmed_filters"] = filters
+
+    # Sections can still query if another session evicted their entries
+    render_dashboard(filters)
+except Exception as e:
+    st.error(f"Erro ao conectar ao banco de dados: {e}")
+    st.stop()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,4 @@
+-- Serves the created_at range + status filters pushed down by load_tasks,
+-- and is scanned backwards for load_recent_tasks' ORDER BY created_at DESC LIMIT
+CREATE INDEX IF NOT EXISTS idx_blue_tasks_created_at_status
+    ON blue_tasks (created_at, status);